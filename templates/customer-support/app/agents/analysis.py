@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Customer message analysis
+Urgency and complexity detection and cache-key normalization. Pure functions
+of the message with no LLM or HTTP client imports, so they are cheap to import
+and test.
+"""
+
+import functools
+import re
+import string
+from typing import Iterable
+
+from config.settings import (
+    COMPLEX_KEYWORDS,
+    HIGH_KEYWORDS,
+    SIMPLE_KEYWORDS,
+    URGENT_KEYWORDS
+)
+
+def _keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    """Compile a keyword set into a single whole-word alternation matched by the C regex engine
+    
+    An optional plural suffix is allowed, so "problems" or "refunds" still match.
+    """
+    alternation = "|".join(re.escape(keyword) for keyword in sorted(keywords))
+    return re.compile(rf"\b(?:{alternation})(?:e?s)?\b")
+
+# Urgency and complexity patterns; regexes rather than token sets so
+# multi-word keywords ("not working", "how to") and punctuation still match
+URGENT_PATTERN = _keyword_pattern(URGENT_KEYWORDS)
+HIGH_PATTERN = _keyword_pattern(HIGH_KEYWORDS)
+COMPLEX_PATTERN = _keyword_pattern(COMPLEX_KEYWORDS)
+SIMPLE_PATTERN = _keyword_pattern(SIMPLE_KEYWORDS)
+
+@functools.lru_cache(maxsize=4096)
+def analyze_message(message_lower: str) -> tuple[str, str]:
+    """Analyze an already-lowercased message for urgency and complexity
+    
+    Pure function of the message, so repeated messages are served from an LRU cache.
+    """
+    
+    # Determine urgency
+    if URGENT_PATTERN.search(message_lower):
+        urgency = "urgent"
+    elif HIGH_PATTERN.search(message_lower):
+        urgency = "high"
+    else:
+        urgency = "normal"
+    
+    # Determine complexity
+    if COMPLEX_PATTERN.search(message_lower):
+        complexity = "high"
+    elif SIMPLE_PATTERN.search(message_lower):
+        complexity = "low"
+    else:
+        complexity = "medium"
+    
+    return urgency, complexity
+
+_PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+def normalize_message(message: str) -> str:
+    """Normalize a message for cache keys: lowercase, no punctuation, single spaces"""
+    return " ".join(message.lower().translate(_PUNCTUATION_TABLE).split())
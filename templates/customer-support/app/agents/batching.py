@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Request batching for LLM calls
+Coalesces concurrent customer requests arriving within a short window into
+one batch, so bursts share the same warm prompt prefix on the provider side.
+"""
+
+import asyncio
+import logging
+from typing import Any, List, Optional, Set, Tuple
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+
+logger = logging.getLogger(__name__)
+
+class RequestBatcher:
+    """Coalescing queue that ships LLM calls in batches"""
+    
+    def __init__(self, llm: Runnable, window_ms: int = 25, max_size: int = 16):
+        self.llm = llm
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self._queue: asyncio.Queue[Tuple[List[BaseMessage], asyncio.Future]] = asyncio.Queue()
+        self._drainer: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+    
+    async def submit(self, messages: List[BaseMessage]) -> Any:
+        """Queue one LLM call and wait for its result from the next batch"""
+        if self._drainer is None:
+            self._drainer = asyncio.create_task(self._drain())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((messages, future))
+        return await future
+    
+    async def close(self) -> None:
+        """Stop draining, fail calls still queued and wait for batches already sent"""
+        if self._drainer:
+            self._drainer.cancel()
+            try:
+                await self._drainer
+            except asyncio.CancelledError:
+                pass
+            self._drainer = None
+        
+        # Queued calls will never be dispatched; release their callers
+        while not self._queue.empty():
+            self._fail([self._queue.get_nowait()])
+        
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+    
+    async def _drain(self) -> None:
+        """Collect queued calls until the window closes or the batch is full"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            
+            try:
+                while len(batch) < self.max_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Closed mid-window: the collected calls will never be dispatched
+                self._fail(batch)
+                raise
+            
+            # Dispatch without blocking the next window
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+    
+    def _fail(self, batch: List[Tuple[List[BaseMessage], asyncio.Future]]) -> None:
+        """Fail the callers of calls that will not be sent"""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("Request batcher closed"))
+    
+    async def _dispatch(self, batch: List[Tuple[List[BaseMessage], asyncio.Future]]) -> None:
+        """Send one batch to the LLM and resolve each caller's future"""
+        try:
+            results = await self.llm.abatch(
+                [messages for messages, _ in batch],
+                return_exceptions=True
+            )
+        except Exception as e:
+            logger.error("LLM batch of %d failed: %s", len(batch), e)
+            results = [e] * len(batch)
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Response cache for repeated questions
+Answers are stored in Redis under a hash of the model, the customer context the
+prompt sees and the normalized message. Escalated and low-confidence answers
+are never cached, and cache errors never fail a request.
+"""
+
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+import orjson
+import redis.asyncio as redis
+
+from agents.analysis import normalize_message
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Customer fields included in prompts; the rest of customer_info only costs tokens
+PROMPT_CUSTOMER_FIELDS = frozenset(["id", "user_id", "tier", "locale"])
+
+def prompt_customer_info(customer_info: Optional[Dict[str, Any]]) -> str:
+    """Compact, key-sorted JSON of the customer fields the agents actually use"""
+    fields = {
+        key: value for key, value in (customer_info or {}).items()
+        if key in PROMPT_CUSTOMER_FIELDS
+    }
+    return orjson.dumps(fields, option=orjson.OPT_SORT_KEYS).decode()
+
+class ResponseCache:
+    """Redis-backed cache of answers to repeated questions"""
+    
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.redis_client = redis_client
+    
+    def key(self, model: str, message: str, customer_info: Optional[Dict[str, Any]]) -> str:
+        """Cache key for a response: SHA-256 of model, prompt customer info and normalized message
+        
+        Covers every input of the prompt except the message's exact wording, so a
+        cached answer never leaks one customer's context into another's response.
+        """
+        customer = prompt_customer_info(customer_info)
+        digest = hashlib.sha256(
+            f"{model}|{customer}|{normalize_message(message)}".encode("utf-8")
+        ).hexdigest()
+        return f"resp:{digest}"
+    
+    def cacheable(self, result: Dict[str, Any]) -> bool:
+        """Only confident answers that did not escalate are worth repeating"""
+        return (
+            not result["escalated"]
+            and result["confidence"] >= settings.response_cache_min_confidence
+        )
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached response"""
+        if not self.redis_client:
+            return None
+        try:
+            cached = await self.redis_client.get(key)
+            return orjson.loads(cached) if cached else None
+        except Exception as e:
+            logger.warning("Response cache lookup failed: %s", e)
+            return None
+    
+    async def store(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a response in the cache if it is cacheable"""
+        if not self.redis_client or not self.cacheable(result):
+            return
+        try:
+            await self.redis_client.set(key, orjson.dumps(result), ex=settings.response_cache_ttl)
+        except Exception as e:
+            logger.warning("Response cache store failed: %s", e)
@@ -11,44 +11,192 @@ Agents:
 
 import os
 import asyncio
+import hashlib
 import logging
+import threading
+import time
+from collections import Counter, OrderedDict
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Callable, Dict, List, Any, Optional
 
-from crewai import Agent, Task, Crew, Process
+import httpx
+import numpy as np
+import redis.asyncio as redis
+from crewai import Agent
 from crewai.tools import BaseTool
-from langchain_openai import ChatOpenAI
-from langchain.tools import tool
-import json
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from pydantic import PrivateAttr
+
+from agents.analysis import analyze_message
+from agents.batching import RequestBatcher
+from agents.response_cache import ResponseCache, prompt_customer_info
+from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# One pooled HTTP client shared by every LLM so connections stay warm across requests
+http_async_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+    http2=True
+)
+
+# Cap on concurrent requests being processed by the LLM
+request_semaphore = asyncio.Semaphore(settings.max_concurrent_requests)
+
+async def close_http_client() -> None:
+    """Close the shared LLM HTTP connection pool"""
+    await http_async_client.aclose()
+
+SUPPORT_INSTRUCTIONS = """Handle the customer request with empathy and accuracy:
+1. Understand the customer's issue clearly
+2. Search the knowledge base for relevant information
+3. Provide a helpful, accurate response
+4. If you cannot resolve the issue, escalate appropriately
+5. Be empathetic and professional
+6. Keep the response concise but complete
+
+Response should be direct and helpful."""
+
+QUALITY_INSTRUCTIONS = """Review the draft support response below for accuracy, empathy and
+solution effectiveness. Reply with the improved response only, ready to send to the customer."""
+
+# Responses longer than this many output tokens count as detailed (~100 characters)
+DETAILED_RESPONSE_TOKENS = 25
+
+def _openai_tool(tool: BaseTool, properties: Dict[str, Any], required: List[str]) -> Dict[str, Any]:
+    """Describe a crew tool as an OpenAI function-calling schema"""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": required
+            }
+        }
+    }
+
+# Mock knowledge base; in production, this would come from your actual knowledge base
+KNOWLEDGE_BASE = {
+    "return policy": "Our return policy allows returns within 30 days of purchase with original receipt.",
+    "shipping": "Standard shipping takes 3-5 business days. Express shipping is 1-2 business days.",
+    "refund": "Refunds are processed within 5-7 business days to the original payment method.",
+    "warranty": "All products come with a 1-year manufacturer warranty covering defects.",
+    "account": "You can reset your password by clicking 'Forgot Password' on the login page.",
+    "billing": "Billing questions can be resolved by checking your account dashboard or contacting billing support.",
+    "technical": "For technical issues, try restarting the application or clearing your browser cache.",
+    "pricing": "Current pricing information is available on our pricing page. Enterprise discounts are available."
+}
+
+FALLBACK_RESPONSE = "I apologize, but I'm experiencing technical difficulties. Please try again in a moment, or I can connect you with a human agent if this is urgent."
+
+# Immutable (keyword, keyword_lower, response) entries, lowercased once at import
+_KB = tuple((keyword, keyword.lower(), response) for keyword, response in KNOWLEDGE_BASE.items())
+
+KB_FALLBACK = "I couldn't find specific information about that in our knowledge base. Let me escalate this to a specialist."
+
+# Reciprocal rank fusion constant (standard value from the RRF paper)
+RRF_K = 60
+
+def _reciprocal_rank_fusion(*rankings: List[int]) -> List[int]:
+    """Fuse several ranked lists of entry indices into one ranking"""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, index in enumerate(ranking):
+            scores[index] = scores.get(index, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+class QueryEmbeddingCache:
+    """LRU cache with TTL for query embeddings, keyed by the SHA-256 of the query"""
+    
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_or_embed(self, query: str, embed: Callable[[str], List[float]]) -> np.ndarray:
+        """Return the cached unit-length embedding for a query, embedding it on a miss"""
+        key = hashlib.sha256(query.encode("utf-8")).hexdigest()
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+        
+        vector = np.asarray(embed(query), dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        
+        with self._lock:
+            self._entries[key] = (now, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return vector
+
 class KnowledgeBaseTool(BaseTool):
     """Tool for searching company knowledge base"""
     
     name: str = "knowledge_base_search"
     description: str = "Search the company knowledge base for relevant information"
     
+    _kb_matrix: Optional[np.ndarray] = PrivateAttr(default=None)
+    _embeddings: Optional[Embeddings] = PrivateAttr(default=None)
+    _query_cache: Optional[QueryEmbeddingCache] = PrivateAttr(default=None)
+    
+    async def build_index(self, embeddings: Embeddings) -> None:
+        """Embed every knowledge base entry once into a normalized (N, D) matrix"""
+        vectors = await embeddings.aembed_documents(
+            [f"{keyword}: {response}" for keyword, _, response in _KB]
+        )
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        
+        self._kb_matrix = matrix
+        self._embeddings = embeddings
+        self._query_cache = QueryEmbeddingCache(
+            maxsize=settings.kb_query_cache_size,
+            ttl=settings.kb_query_cache_ttl
+        )
+    
     def _run(self, query: str) -> str:
-        """Search knowledge base (mock implementation)"""
-        # In production, this would connect to your actual knowledge base
-        knowledge_responses = {
-            "return policy": "Our return policy allows returns within 30 days of purchase with original receipt.",
-            "shipping": "Standard shipping takes 3-5 business days. Express shipping is 1-2 business days.",
-            "refund": "Refunds are processed within 5-7 business days to the original payment method.",
-            "warranty": "All products come with a 1-year manufacturer warranty covering defects.",
-            "account": "You can reset your password by clicking 'Forgot Password' on the login page.",
-            "billing": "Billing questions can be resolved by checking your account dashboard or contacting billing support.",
-            "technical": "For technical issues, try restarting the application or clearing your browser cache.",
-            "pricing": "Current pricing information is available on our pricing page. Enterprise discounts are available."
-        }
+        """Search knowledge base with hybrid keyword + vector ranking"""
+        query_lower = query.lower()
+        keyword_hits = [
+            index for index, (_, keyword_lower, _) in enumerate(_KB)
+            if keyword_lower in query_lower
+        ]
         
-        # Simple keyword matching (in production, use vector search)
-        for keyword, response in knowledge_responses.items():
-            if keyword.lower() in query.lower():
-                return response
+        # A single exact keyword hit is unambiguous: skip the embedding round-trip
+        if len(keyword_hits) == 1 or (keyword_hits and self._kb_matrix is None):
+            return _KB[keyword_hits[0]][2]
         
-        return "I couldn't find specific information about that in our knowledge base. Let me escalate this to a specialist."
+        # Otherwise rank by vector similarity and fuse with any keyword hits
+        vector_hits: List[int] = []
+        if self._kb_matrix is not None:
+            try:
+                query_vector = self._query_cache.get_or_embed(query, self._embeddings.embed_query)
+            except Exception as e:
+                # An embedding outage degrades to keyword ranking instead of failing the request
+                logger.warning("Query embedding failed, ranking on keywords only: %s", e)
+            else:
+                scores = self._kb_matrix @ query_vector
+                vector_hits = [
+                    int(index) for index in np.argsort(-scores)
+                    if scores[index] > settings.kb_similarity_threshold
+                ]
+        
+        ranked = _reciprocal_rank_fusion(keyword_hits, vector_hits)
+        if ranked:
+            return _KB[ranked[0]][2]
+        
+        return KB_FALLBACK
 
 class EscalationTool(BaseTool):
     """Tool for escalating issues to human agents"""
@@ -61,34 +209,112 @@ class EscalationTool(BaseTool):
         escalation_id = f"ESC-{datetime.now().strftime('%Y%m%d%H%M%S')}"
         
         # In production, this would create a ticket in your support system
-        logger.info(f"Escalation created: {escalation_id} - Reason: {reason}")
+        logger.info("Escalation created: %s - Reason: %s", escalation_id, reason)
         
         return f"I've escalated your issue (ID: {escalation_id}) to our specialist team. A human agent will contact you within 15 minutes for {urgency} priority issues."
 
 class CustomerSupportCrew:
     """CrewAI-based customer support system"""
     
-    def __init__(self):
-        """Initialize the customer support crew"""
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        """Initialize the customer support crew
         
-        # Initialize LLM
-        self.llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4"),
+        Args:
+            redis_client: Optional Redis client used to cache responses
+        """
+        self.response_cache = ResponseCache(redis_client)
+        
+        # Initialize LLMs on the shared connection pool: the strong model handles
+        # urgent or complex requests, the fast model everything else
+        self.llm_strong = ChatOpenAI(
+            model=settings.openai_model,
             temperature=0.7,
-            api_key=os.getenv("OPENAI_API_KEY")
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_async_client=http_async_client,
+            stream_usage=True
+        )
+        self.llm_fast = self.llm_strong
+        if settings.enable_fast_routing:
+            self.llm_fast = ChatOpenAI(
+                model=settings.fast_model,
+                temperature=0.7,
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_async_client=http_async_client,
+                stream_usage=True
+            )
+        self.model_usage: Counter[str] = Counter()
+        
+        # Deterministic reviewer so identical drafts get identical reviews
+        self.qa_llm = ChatOpenAI(
+            model=settings.openai_model,
+            temperature=0,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_async_client=http_async_client
         )
         
         # Initialize tools
         self.knowledge_tool = KnowledgeBaseTool()
         self.escalation_tool = EscalationTool()
+        self.tools = {
+            self.knowledge_tool.name: self.knowledge_tool,
+            self.escalation_tool.name: self.escalation_tool
+        }
+        
+        # Expose both tools as OpenAI functions so the models can call them in parallel
+        tool_schemas = [
+            _openai_tool(
+                self.knowledge_tool,
+                {"query": {"type": "string", "description": "Topic to look up"}},
+                ["query"]
+            ),
+            _openai_tool(
+                self.escalation_tool,
+                {
+                    "reason": {"type": "string", "description": "Why the issue needs a human"},
+                    "customer_info": {"type": "string", "description": "Relevant customer context"},
+                    "urgency": {"type": "string", "enum": ["normal", "high", "urgent"]}
+                },
+                ["reason"]
+            )
+        ]
+        self.llms_with_tools = {
+            llm.model_name: llm.bind_tools(tool_schemas, parallel_tool_calls=True)
+            for llm in (self.llm_fast, self.llm_strong)
+        }
+        # Same models with tool calls disabled, to force a text answer once the
+        # tool round limit is reached
+        self.llms_answer_only = {
+            llm.model_name: llm.bind_tools(tool_schemas, tool_choice="none")
+            for llm in (self.llm_fast, self.llm_strong)
+        }
+        
+        # Coalesce bursts of requests into per-model batches in production; dev keeps
+        # per-request latency
+        self.batchers: Dict[str, RequestBatcher] = {}
+        if settings.environment == "production":
+            self.batchers = {
+                model: RequestBatcher(
+                    llm_with_tools,
+                    window_ms=settings.batch_window_ms,
+                    max_size=settings.batch_max_size
+                )
+                for model, llm_with_tools in self.llms_with_tools.items()
+            }
         
-        # Create agents
+        # Create agents (used as prompt templates for the single-pass LLM call)
         self.support_agent = self._create_support_agent()
         self.manager_agent = self._create_manager_agent()
         self.quality_agent = self._create_quality_agent()
         
-        # Create crew
-        self.crew = self._create_crew()
+        # Render system prompts once so the prompt prefix is byte-identical across
+        # requests and the provider's prompt cache can reuse it
+        self.system_messages = {
+            agent.role: SystemMessage(content=self._system_prompt(agent, SUPPORT_INSTRUCTIONS))
+            for agent in (self.support_agent, self.manager_agent)
+        }
+        self.quality_system_message = SystemMessage(
+            content=self._system_prompt(self.quality_agent, QUALITY_INSTRUCTIONS)
+        )
         
         logger.info("✅ Customer support crew initialized")
     
@@ -102,9 +328,9 @@ class CustomerSupportCrew:
             issues on the first contact. You have access to the company knowledge base and 
             can escalate complex issues when needed.""",
             tools=[self.knowledge_tool, self.escalation_tool],
-            llm=self.llm,
-            verbose=True,
-            allow_delegation=True,
+            llm=self.llm_fast,
+            verbose=settings.crew_verbose,
+            allow_delegation=False,
             max_iter=3,
             memory=True
         )
@@ -119,8 +345,8 @@ class CustomerSupportCrew:
             about refunds, discounts, and policy exceptions. You work closely with other 
             departments to resolve issues quickly.""",
             tools=[self.knowledge_tool, self.escalation_tool],
-            llm=self.llm,
-            verbose=True,
+            llm=self.llm_strong,
+            verbose=settings.crew_verbose,
             allow_delegation=False,
             max_iter=2,
             memory=True
@@ -136,28 +362,19 @@ class CustomerSupportCrew:
             empathy, and solution effectiveness. You provide feedback to improve our 
             support processes.""",
             tools=[],
-            llm=self.llm,
-            verbose=True,
+            llm=self.llm_strong,
+            verbose=settings.crew_verbose,
             allow_delegation=False,
             max_iter=1,
             memory=True
         )
     
-    def _create_crew(self) -> Crew:
-        """Create the support crew"""
-        return Crew(
-            agents=[self.support_agent, self.manager_agent, self.quality_agent],
-            process=Process.hierarchical,
-            manager_llm=self.llm,
-            verbose=True,
-            memory=True
-        )
-    
     async def process_customer_request(
         self, 
         message: str, 
         session_id: str,
-        customer_info: Dict[str, Any] = None
+        customer_info: Dict[str, Any] = None,
+        warmup: bool = False
     ) -> Dict[str, Any]:
         """
         Process a customer request through the support crew
@@ -166,133 +383,373 @@ class CustomerSupportCrew:
             message: Customer message
             session_id: Unique session identifier
             customer_info: Customer context information
+            warmup: Synthetic start-up request; skips the response cache, usage
+                counters, escalations and quality review
             
         Returns:
             Dict with response, agent_used, confidence, escalated status
         """
         try:
             # Analyze message for urgency and complexity
-            urgency, complexity = self._analyze_message(message)
+            urgency, complexity = analyze_message(message.lower())
+            
+            # Determine which agent and model should handle this
+            primary_agent, llm = self._route_to_agent(urgency, complexity)
             
-            # Determine which agent should handle this
-            primary_agent = self._route_to_agent(urgency, complexity)
+            # Identical questions with the same customer context are served from cache
+            cache_key = self.response_cache.key(llm.model_name, message, customer_info)
+            cached = None if warmup else await self.response_cache.get(cache_key)
+            if cached:
+                cached["session_id"] = session_id
+                cached["cached"] = True
+                return cached
             
-            # Create task for the selected agent
-            task = Task(
-                description=f"""
-                Handle this customer request with empathy and accuracy:
+            # Bound in-flight LLM work so provider rate limits are respected
+            async with request_semaphore:
+                # The model answers directly or requests tools in parallel; every round
+                # of tool calls is executed until it answers, capped like max_iter
+                messages = self._build_messages(
+                    primary_agent, message, customer_info, urgency, complexity
+                )
+                tool_calls: List[Dict[str, Any]] = []
+                tool_messages: List[ToolMessage] = []
+                for tool_round in range(settings.max_iterations + 1):
+                    ai_message = await self._invoke_llm(
+                        llm.model_name,
+                        messages,
+                        allow_tools=tool_round < settings.max_iterations
+                    )
+                    if not ai_message.tool_calls:
+                        break
+                    round_messages = await self._run_tool_calls(
+                        ai_message.tool_calls, skip_escalation=warmup
+                    )
+                    tool_calls.extend(ai_message.tool_calls)
+                    tool_messages.extend(round_messages)
+                    messages.append(ai_message)
+                    messages.extend(round_messages)
                 
-                Customer Message: "{message}"
-                Session ID: {session_id}
-                Customer Info: {json.dumps(customer_info or {}, indent=2)}
-                Urgency: {urgency}
-                Complexity: {complexity}
+                # Extract the response
+                response_text = ai_message.content
                 
-                Instructions:
-                1. Understand the customer's issue clearly
-                2. Search the knowledge base for relevant information
-                3. Provide a helpful, accurate response
-                4. If you cannot resolve the issue, escalate appropriately
-                5. Be empathetic and professional
-                6. Keep the response concise but complete
+                # Escalation and confidence come from the tool calls of every round and usage
+                escalated = self._escalated(tool_calls)
+                confidence = self._calculate_confidence(
+                    escalated,
+                    self._kb_grounded(tool_calls, tool_messages),
+                    self._output_tokens(ai_message)
+                )
                 
-                Response should be direct and helpful.
-                """,
-                agent=primary_agent,
-                expected_output="A helpful customer support response that addresses the customer's concern"
-            )
+                # Only low-confidence answers go through quality review
+                quality_reviewed = not warmup and confidence < settings.qa_confidence_threshold
+                if quality_reviewed:
+                    response_text = await self._quality_review(message, response_text)
+                
+                result = {
+                    "response": response_text,
+                    "agent_used": primary_agent.role,
+                    "confidence": confidence,
+                    "escalated": escalated,
+                    "session_id": session_id,
+                    "urgency": urgency,
+                    "complexity": complexity,
+                    "quality_reviewed": quality_reviewed,
+                    "model": llm.model_name,
+                    "cached": False
+                }
             
-            # Execute the task
-            result = await asyncio.to_thread(self.crew.kickoff, tasks=[task])
+            if warmup:
+                return result
             
-            # Extract the response
-            response_text = str(result)
+            self.model_usage[llm.model_name] += 1
+            await self.response_cache.store(cache_key, result)
             
-            # Determine if escalation occurred
-            escalated = "escalat" in response_text.lower() or "specialist" in response_text.lower()
+            return result
             
-            # Calculate confidence based on response quality
-            confidence = self._calculate_confidence(response_text, message)
+        except Exception as e:
+            logger.error("Error processing customer request: %s", e)
             
+            # Fallback response
             return {
+                "response": FALLBACK_RESPONSE,
+                "agent_used": "Fallback Handler",
+                "confidence": 0.1,
+                "escalated": True,
+                "session_id": session_id,
+                "urgency": "normal",
+                "complexity": "high",
+                "quality_reviewed": False,
+                "model": None,
+                "cached": False
+            }
+    
+    async def process_customer_request_stream(
+        self,
+        message: str,
+        session_id: str,
+        customer_info: Dict[str, Any] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a customer request, streaming the response as it is generated
+        
+        Streamed answers skip quality review since they are already on the wire.
+        
+        Yields:
+            {"type": "delta", "text": ...} frames, then one {"type": "done", ...}
+            frame with agent, confidence and escalated status. On failure, an
+            {"type": "error", "detail": ...} frame replacing any partial answer
+            comes before the done frame.
+        """
+        try:
+            urgency, complexity = analyze_message(message.lower())
+            primary_agent, llm = self._route_to_agent(urgency, complexity)
+            
+            cache_key = self.response_cache.key(llm.model_name, message, customer_info)
+            cached = await self.response_cache.get(cache_key)
+            if cached:
+                yield {"type": "delta", "text": cached["response"]}
+                yield {
+                    "type": "done",
+                    "agent": cached["agent_used"],
+                    "model": cached.get("model"),
+                    "confidence": cached["confidence"],
+                    "escalated": cached["escalated"],
+                    "cached": True
+                }
+                return
+            
+            async with request_semaphore:
+                messages = self._build_messages(
+                    primary_agent, message, customer_info, urgency, complexity
+                )
+                
+                # Stream every pass; tool rounds are executed until the model answers,
+                # capped like max_iter
+                response_parts: List[str] = []
+                tool_calls: List[Dict[str, Any]] = []
+                tool_messages: List[ToolMessage] = []
+                for tool_round in range(settings.max_iterations + 1):
+                    runnable = (
+                        self.llms_with_tools[llm.model_name]
+                        if tool_round < settings.max_iterations
+                        else self.llms_answer_only[llm.model_name]
+                    )
+                    gathered = None
+                    async for chunk in runnable.astream(messages):
+                        gathered = chunk if gathered is None else gathered + chunk
+                        if chunk.content:
+                            response_parts.append(chunk.content)
+                            yield {"type": "delta", "text": chunk.content}
+                    
+                    if gathered is None or not gathered.tool_calls:
+                        break
+                    round_messages = await self._run_tool_calls(gathered.tool_calls)
+                    tool_calls.extend(gathered.tool_calls)
+                    tool_messages.extend(round_messages)
+                    messages.append(gathered)
+                    messages.extend(round_messages)
+                
+                response_text = "".join(response_parts)
+                escalated = self._escalated(tool_calls)
+                confidence = self._calculate_confidence(
+                    escalated,
+                    self._kb_grounded(tool_calls, tool_messages),
+                    self._output_tokens(gathered)
+                )
+                self.model_usage[llm.model_name] += 1
+            
+            yield {
+                "type": "done",
+                "agent": primary_agent.role,
+                "model": llm.model_name,
+                "confidence": confidence,
+                "escalated": escalated,
+                "cached": False
+            }
+            
+            await self.response_cache.store(cache_key, {
                 "response": response_text,
                 "agent_used": primary_agent.role,
                 "confidence": confidence,
                 "escalated": escalated,
                 "session_id": session_id,
                 "urgency": urgency,
-                "complexity": complexity
-            }
+                "complexity": complexity,
+                "quality_reviewed": False,
+                "model": llm.model_name,
+                "cached": False
+            })
             
         except Exception as e:
-            logger.error(f"Error processing customer request: {e}")
-            
-            # Fallback response
-            return {
-                "response": "I apologize, but I'm experiencing technical difficulties. Please try again in a moment, or I can connect you with a human agent if this is urgent.",
-                "agent_used": "Fallback Handler",
+            logger.error("Error streaming customer request: %s", e)
+            # Deltas may already be on the wire: the error frame tells the client
+            # to replace the partial answer rather than append to it
+            yield {"type": "error", "detail": FALLBACK_RESPONSE}
+            yield {
+                "type": "done",
+                "agent": "Fallback Handler",
+                "model": None,
                 "confidence": 0.1,
                 "escalated": True,
-                "session_id": session_id,
-                "urgency": "normal",
-                "complexity": "high"
+                "cached": False
             }
     
-    def _analyze_message(self, message: str) -> tuple[str, str]:
-        """Analyze message for urgency and complexity"""
-        
-        # Urgency keywords
-        urgent_keywords = ["urgent", "emergency", "asap", "immediately", "broken", "down", "not working", "critical"]
-        high_keywords = ["problem", "issue", "error", "help", "wrong", "failed"]
-        
-        # Complexity indicators
-        complex_keywords = ["refund", "billing", "account", "technical", "integration", "api", "database"]
-        simple_keywords = ["question", "how to", "information", "status", "when", "where"]
-        
-        message_lower = message.lower()
+    def _build_messages(
+        self,
+        agent: Agent,
+        message: str,
+        customer_info: Optional[Dict[str, Any]],
+        urgency: str,
+        complexity: str
+    ) -> List[BaseMessage]:
+        """Build the chat messages for the selected agent
         
-        # Determine urgency
-        if any(keyword in message_lower for keyword in urgent_keywords):
-            urgency = "urgent"
-        elif any(keyword in message_lower for keyword in high_keywords):
-            urgency = "high"
-        else:
-            urgency = "normal"
+        The static system prompt comes first and all per-request content last,
+        ending with the customer message, to keep the cacheable prefix long.
+        The session ID is left out: responses are cached across sessions, so
+        nothing in the prompt may be session-specific.
+        """
+        user_prompt = (
+            f"Urgency: {urgency}\n"
+            f"Complexity: {complexity}\n"
+            f"Customer Info: {prompt_customer_info(customer_info)}\n"
+            f'Customer Message: "{message}"'
+        )
+        return [self.system_messages[agent.role], HumanMessage(content=user_prompt)]
+    
+    def _system_prompt(self, agent: Agent, instructions: str) -> str:
+        """Render an agent's role, goal and backstory as a system prompt"""
+        return (
+            f"You are a {agent.role}.\n"
+            f"Goal: {agent.goal}\n"
+            f"Backstory: {agent.backstory}\n\n"
+            f"{instructions}"
+        )
+    
+    async def _invoke_llm(
+        self,
+        model: str,
+        messages: List[BaseMessage],
+        allow_tools: bool = True
+    ) -> AIMessage:
+        """Call a tool-enabled LLM, through its batcher when batching is enabled
         
-        # Determine complexity
-        if any(keyword in message_lower for keyword in complex_keywords):
-            complexity = "high"
-        elif any(keyword in message_lower for keyword in simple_keywords):
-            complexity = "low"
-        else:
-            complexity = "medium"
+        With allow_tools=False the model must answer in text.
+        """
+        if not allow_tools:
+            return await self.llms_answer_only[model].ainvoke(messages)
+        batcher = self.batchers.get(model)
+        if batcher:
+            return await batcher.submit(messages)
+        return await self.llms_with_tools[model].ainvoke(messages)
+    
+    async def _run_tool_calls(
+        self,
+        tool_calls: List[Dict[str, Any]],
+        skip_escalation: bool = False
+    ) -> List[ToolMessage]:
+        """Execute the model's tool calls concurrently
         
-        return urgency, complexity
+        With skip_escalation=True, escalation calls are answered without creating a ticket.
+        """
+        results = await asyncio.gather(*[
+            self._skipped_escalation()
+            if skip_escalation and call["name"] == self.escalation_tool.name
+            else asyncio.to_thread(self.tools[call["name"]]._run, **call["args"])
+            for call in tool_calls
+        ])
+        return [
+            ToolMessage(content=result, tool_call_id=call["id"])
+            for call, result in zip(tool_calls, results)
+        ]
     
-    def _route_to_agent(self, urgency: str, complexity: str) -> Agent:
-        """Route to appropriate agent based on urgency and complexity"""
+    async def _skipped_escalation(self) -> str:
+        """Tool result standing in for an escalation that was not created"""
+        return "Escalation skipped for a synthetic request."
+    
+    async def _quality_review(self, message: str, response: str) -> str:
+        """Have the quality agent revise a low-confidence response"""
+        messages = [
+            self.quality_system_message,
+            HumanMessage(content=f'Customer Message: "{message}"\n\nDraft Response: {response}')
+        ]
+        reviewed = await self.qa_llm.ainvoke(messages)
+        return reviewed.content or response
+    
+    async def build_knowledge_index(self) -> None:
+        """Embed the knowledge base once; keyword matching still works if this fails"""
+        embeddings = OpenAIEmbeddings(
+            model=settings.embedding_model,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=settings.kb_embedding_timeout,
+            max_retries=1
+        )
+        try:
+            await asyncio.wait_for(
+                self.knowledge_tool.build_index(embeddings),
+                timeout=settings.kb_embedding_timeout
+            )
+        except Exception as e:
+            logger.warning("Knowledge base embedding index unavailable, using keyword search: %r", e)
+    
+    async def close(self) -> None:
+        """Stop the request batchers"""
+        for batcher in self.batchers.values():
+            await batcher.close()
+    
+    async def warmup(self) -> None:
+        """Open pooled connections and prime the provider prompt cache for each model"""
+        await asyncio.gather(*[
+            self.llms_with_tools[llm.model_name].ainvoke([
+                self.system_messages[agent.role],
+                HumanMessage(content="ping")
+            ])
+            for agent, llm in (
+                (self.support_agent, self.llm_fast),
+                (self.manager_agent, self.llm_strong)
+            )
+        ])
+    
+    def _route_to_agent(self, urgency: str, complexity: str) -> tuple[Agent, ChatOpenAI]:
+        """Route to appropriate agent and model based on urgency and complexity"""
         
         if urgency == "urgent" or complexity == "high":
-            return self.manager_agent
+            return self.manager_agent, self.llm_strong
         else:
-            return self.support_agent
+            return self.support_agent, self.llm_fast
+    
+    def _escalated(self, tool_calls: List[Dict[str, Any]]) -> bool:
+        """Whether the model escalated to a human via the escalation tool"""
+        return any(call["name"] == self.escalation_tool.name for call in tool_calls)
+    
+    def _kb_grounded(self, tool_calls: List[Dict[str, Any]], tool_messages: List[ToolMessage]) -> bool:
+        """Whether a knowledge base search returned an actual answer"""
+        return any(
+            call["name"] == self.knowledge_tool.name and result.content != KB_FALLBACK
+            for call, result in zip(tool_calls, tool_messages)
+        )
+    
+    def _output_tokens(self, ai_message: Optional[AIMessage]) -> int:
+        """Completion token count reported by the API, 0 if unavailable"""
+        usage = getattr(ai_message, "usage_metadata", None) or {}
+        return usage.get("output_tokens", 0)
     
-    def _calculate_confidence(self, response: str, original_message: str) -> float:
-        """Calculate confidence score for the response"""
+    def _calculate_confidence(self, escalated: bool, kb_grounded: bool, output_tokens: int) -> float:
+        """Calculate confidence score for the response from structured signals"""
         
         # Simple confidence calculation based on response characteristics
         confidence = 0.5  # Base confidence
         
         # Increase confidence for longer, detailed responses
-        if len(response) > 100:
+        if output_tokens > DETAILED_RESPONSE_TOKENS:
             confidence += 0.2
         
-        # Increase confidence if response contains specific information
-        if any(word in response.lower() for word in ["policy", "process", "contact", "resolve"]):
+        # Increase confidence if the answer is grounded in the knowledge base
+        if kb_grounded:
             confidence += 0.2
         
         # Decrease confidence for escalations
-        if "escalat" in response.lower() or "specialist" in response.lower():
+        if escalated:
             confidence -= 0.3
         
         # Ensure confidence is between 0 and 1
@@ -314,5 +771,6 @@ class CustomerSupportCrew:
             "average_response_time": 1.2,
             "escalation_rate": 0.08,
             "customer_satisfaction": 4.7,
+            "model_usage": dict(self.model_usage),
             "agents_active": 3
         }
\ No newline at end of file
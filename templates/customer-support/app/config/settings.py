@@ -31,6 +31,18 @@ class Settings(BaseSettings):
         default="gpt-4",
         description="OpenAI model to use"
     )
+    fast_model: str = Field(
+        default="gpt-4o-mini",
+        description="Cheaper model for requests that are neither urgent nor complex"
+    )
+    enable_fast_routing: bool = Field(
+        default=True,
+        description="Route simple requests to fast_model; disable to send everything to openai_model"
+    )
+    embedding_model: str = Field(
+        default="text-embedding-3-small",
+        description="OpenAI embedding model for knowledge base search"
+    )
     
     # Redis Configuration
     redis_url: str = Field(
@@ -41,6 +53,14 @@ class Settings(BaseSettings):
         default=None,
         description="Redis password if required"
     )
+    redis_max_connections: int = Field(
+        default=50,
+        description="Maximum pooled Redis connections"
+    )
+    redis_pool_timeout: int = Field(
+        default=5,
+        description="Seconds to wait for a free pooled Redis connection"
+    )
     
     # Database Configuration (for future use)
     database_url: str = Field(
@@ -71,6 +91,38 @@ class Settings(BaseSettings):
         default=3,
         description="Maximum iterations for agent tasks"
     )
+    qa_confidence_threshold: float = Field(
+        default=0.6,
+        description="Responses below this confidence are reviewed by the quality agent"
+    )
+    
+    # Knowledge Base Configuration
+    kb_similarity_threshold: float = Field(
+        default=0.75,
+        description="Minimum cosine similarity for a knowledge base vector match"
+    )
+    kb_embedding_timeout: float = Field(
+        default=5.0,
+        description="Timeout in seconds for knowledge base embedding calls"
+    )
+    kb_query_cache_size: int = Field(
+        default=1024,
+        description="Maximum number of cached query embeddings"
+    )
+    kb_query_cache_ttl: int = Field(
+        default=3600,
+        description="Query embedding cache TTL in seconds"
+    )
+    
+    # Response Cache Configuration
+    response_cache_ttl: int = Field(
+        default=3600,
+        description="TTL in seconds for cached responses to identical questions"
+    )
+    response_cache_min_confidence: float = Field(
+        default=0.7,
+        description="Minimum confidence for a response to be cached"
+    )
     
     # Performance Configuration
     request_timeout: int = Field(
@@ -81,6 +133,22 @@ class Settings(BaseSettings):
         default=100,
         description="Maximum concurrent requests"
     )
+    max_message_length: int = Field(
+        default=4000,
+        description="Maximum customer message length in characters"
+    )
+    warmup_timeout: int = Field(
+        default=20,
+        description="Budget in seconds for the background start-up warm-up"
+    )
+    batch_window_ms: int = Field(
+        default=25,
+        description="Window for coalescing concurrent LLM calls into one batch (production only)"
+    )
+    batch_max_size: int = Field(
+        default=16,
+        description="Maximum LLM calls per batch"
+    )
     
     # Monitoring Configuration
     enable_metrics: bool = Field(
@@ -133,6 +201,7 @@ class Settings(BaseSettings):
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = False
+        frozen = True
         
         # Environment variable prefixes
         env_prefix = "CUSTOMER_SUPPORT_"
@@ -184,4 +253,18 @@ def get_settings() -> Settings:
         return Settings()
 
 # Global settings instance
-settings = get_settings()
\ No newline at end of file
+settings = get_settings()
+
+# Keyword sets, frozen once at import for O(1) membership tests
+
+# Urgency keywords
+URGENT_KEYWORDS = frozenset([
+    "urgent", "emergency", "asap", "immediately", "broken", "down", "not working", "critical"
+])
+HIGH_KEYWORDS = frozenset(["problem", "issue", "error", "help", "wrong", "failed"])
+
+# Complexity indicators
+COMPLEX_KEYWORDS = frozenset([
+    "refund", "billing", "account", "technical", "integration", "api", "database"
+])
+SIMPLE_KEYWORDS = frozenset(["question", "how to", "information", "status", "when", "where"])
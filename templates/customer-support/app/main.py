@@ -14,38 +14,59 @@ This is a production-ready template that includes:
 import os
 import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import Dict, Optional, Union
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Depends, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+import msgpack
+import orjson
 import redis.asyncio as redis
 
-from agents.support_crew import CustomerSupportCrew
-from config.settings import Settings
+from agents.analysis import analyze_message
+from agents.support_crew import CustomerSupportCrew, close_http_client
+from config.settings import settings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize settings
-settings = Settings()
-
-# Redis connection for session management
+# Redis connection pool and client for session management
+redis_pool: Optional[redis.ConnectionPool] = None
 redis_client: Optional[redis.Redis] = None
 
-class ChatMessage(BaseModel):
+class CustomerInfo(BaseModel):
+    """Customer context model"""
+    model_config = ConfigDict(frozen=True)
+    
+    id: Optional[Union[str, int]] = Field(None, description="Customer ID")
+    user_id: Optional[Union[str, int]] = Field(None, description="User account ID")
+    email: Optional[str] = Field(None, description="Customer email")
+    tier: Optional[str] = Field(None, description="Customer tier")
+    locale: Optional[str] = Field(None, description="Customer locale")
+
+class WebSocketMessage(BaseModel):
+    """Chat message received over the WebSocket, whose URL carries the session ID"""
+    model_config = ConfigDict(frozen=True)
+    
+    message: str = Field(..., max_length=settings.max_message_length, description="User message")
+    customer_info: Optional[CustomerInfo] = Field(None, description="Customer context")
+
+class ChatMessage(WebSocketMessage):
     """Chat message model"""
-    message: str = Field(..., description="User message")
+    
     session_id: str = Field(..., description="Chat session ID")
-    customer_info: Optional[Dict[str, Any]] = Field(None, description="Customer context")
 
 class ChatResponse(BaseModel):
     """Chat response model"""
+    model_config = ConfigDict(frozen=True)
+    
     response: str = Field(..., description="Agent response")
     session_id: str = Field(..., description="Chat session ID")
     agent_used: str = Field(..., description="Which agent handled the request")
@@ -55,30 +76,119 @@ class ChatResponse(BaseModel):
 
 class HealthCheck(BaseModel):
     """Health check response"""
+    model_config = ConfigDict(frozen=True)
+    
     status: str
     timestamp: datetime
     version: str = "1.0.0"
     uptime: str
 
+def encode_message(message: dict) -> bytes:
+    """Encode an outgoing WebSocket message as UTF-8 JSON"""
+    return orjson.dumps(message, option=orjson.OPT_NAIVE_UTC)
+
 class ConnectionManager:
-    """WebSocket connection manager for real-time chat"""
+    """WebSocket connection manager for real-time chat
+    
+    Messages for a session are published to the Redis channel
+    `ch:session:{session_id}`, so any worker can reach a WebSocket held by any
+    other worker. Each worker holds one pub/sub connection subscribed to the
+    sessions connected to it. Without Redis, delivery falls back to the local
+    process.
+    
+    Outgoing messages are orjson-encoded JSON sent as binary frames; clients
+    decode them as UTF-8 JSON (e.g. `JSON.parse(await event.data.text())`).
+    """
+    
+    channel_prefix = "ch:session:"
     
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        self.pubsub: Optional[redis.client.PubSub] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+    
+    async def start(self, client: redis.Redis):
+        """Open this worker's pub/sub connection and start forwarding messages"""
+        self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self._listener = asyncio.create_task(self._forward_messages())
+    
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self.pubsub:
+            await self.pubsub.reset()
+            self.pubsub = None
     
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
+        # Subscribe first so a failure never leaves a stale registration; the
+        # session still streams locally, only cross-worker pushes are lost
+        if self.pubsub:
+            try:
+                await self.pubsub.subscribe(self.channel_prefix + session_id)
+                self._subscribed.set()
+            except Exception as e:
+                logger.error("Failed to subscribe session %s: %s", session_id, e)
         self.active_connections[session_id] = websocket
-        logger.info(f"WebSocket connected for session: {session_id}")
+        logger.info("WebSocket connected for session: %s", session_id)
     
-    def disconnect(self, session_id: str):
+    async def disconnect(self, session_id: str):
         if session_id in self.active_connections:
             del self.active_connections[session_id]
-            logger.info(f"WebSocket disconnected for session: {session_id}")
+            if self.pubsub:
+                try:
+                    await self.pubsub.unsubscribe(self.channel_prefix + session_id)
+                except Exception as e:
+                    logger.error("Failed to unsubscribe session %s: %s", session_id, e)
+            logger.info("WebSocket disconnected for session: %s", session_id)
     
     async def send_message(self, session_id: str, message: dict):
-        if session_id in self.active_connections:
-            await self.active_connections[session_id].send_json(message)
+        payload = encode_message(message)
+        if self.pubsub:
+            try:
+                await redis_client.publish(self.channel_prefix + session_id, payload)
+            except Exception as e:
+                logger.error("Failed to publish message to session %s: %s", session_id, e)
+        elif session_id in self.active_connections:
+            await self.active_connections[session_id].send_bytes(payload)
+    
+    async def active_session_count(self) -> int:
+        """Number of connected sessions across all workers (this worker's if Redis fails)"""
+        if self.pubsub:
+            try:
+                return len(await redis_client.pubsub_channels(f"{self.channel_prefix}*"))
+            except Exception as e:
+                logger.warning("Failed to count sessions across workers, using local count: %s", e)
+        return len(self.active_connections)
+    
+    async def _forward_messages(self):
+        """Forward published messages to the WebSockets connected to this worker"""
+        while True:
+            if not self.pubsub.subscribed:
+                self._subscribed.clear()
+                await self._subscribed.wait()
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except Exception as e:
+                logger.error("Pub/sub receive failed: %s", e)
+                await asyncio.sleep(1)
+                continue
+            if not message:
+                continue
+            
+            session_id = message["channel"].decode()[len(self.channel_prefix):]
+            websocket = self.active_connections.get(session_id)
+            if websocket:
+                try:
+                    await websocket.send_bytes(message["data"])
+                except Exception as e:
+                    logger.error("Failed to forward message to session %s: %s", session_id, e)
 
 # Global connection manager
 manager = ConnectionManager()
@@ -86,46 +196,140 @@ manager = ConnectionManager()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    global redis_client
+    global redis_pool, redis_client
     
     # Startup
     logger.info("🚀 Starting Customer Support Agent System")
     
-    # Initialize Redis connection
+    # Initialize Redis connection pool (raw bytes: entries are MessagePack-encoded);
+    # a blocking pool makes bursts beyond max_connections wait for a free
+    # connection instead of failing with "Too many connections"
     try:
-        redis_client = redis.from_url(
+        redis_pool = redis.BlockingConnectionPool.from_url(
             settings.redis_url,
-            encoding="utf-8",
-            decode_responses=True
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout
         )
+        redis_client = redis.Redis(connection_pool=redis_pool)
         await redis_client.ping()
         logger.info("✅ Redis connection established")
     except Exception as e:
-        logger.error(f"❌ Redis connection failed: {e}")
+        logger.error("❌ Redis connection failed: %s", e)
         redis_client = None
     
+    # Fan WebSocket messages out across workers over Redis pub/sub
+    if redis_client:
+        await manager.start(redis_client)
+    
     # Initialize CrewAI agents
     try:
-        support_crew = CustomerSupportCrew()
+        support_crew = CustomerSupportCrew(redis_client=redis_client)
         app.state.support_crew = support_crew
         logger.info("✅ Customer support crew initialized")
     except Exception as e:
-        logger.error(f"❌ Failed to initialize support crew: {e}")
+        logger.error("❌ Failed to initialize support crew: %s", e)
         raise
     
+    # Embed the knowledge base under a short timeout; keyword search covers a miss
+    await support_crew.build_knowledge_index()
+    
+    # Warm up in the background: start-up finishes immediately, so the worker
+    # heartbeat and health probes are never held up by a slow provider
+    warmup_task = asyncio.create_task(warm_up(support_crew))
+    
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down Customer Support Agent System")
+    warmup_task.cancel()
+    try:
+        await warmup_task
+    except asyncio.CancelledError:
+        pass
+    await app.state.support_crew.close()
+    await manager.stop()
     if redis_client:
         await redis_client.close()
+    if redis_pool:
+        await redis_pool.disconnect()
+    await close_http_client()
+
+async def warm_up(support_crew: CustomerSupportCrew):
+    """Warm connection pools and push one synthetic request through the full path
+    
+    Opens the pooled Redis and LLM connections, primes the prompt cache, then
+    runs a synthetic request (tools, response model) that leaves no trace: no
+    cache entry, usage count or escalation. Everything shares one
+    warmup_timeout budget, and the result is discarded.
+    """
+    try:
+        async with asyncio.timeout(settings.warmup_timeout):
+            if redis_client:
+                # Concurrent pings open every pooled connection
+                await asyncio.gather(*[
+                    redis_client.ping() for _ in range(settings.redis_max_connections)
+                ])
+            await support_crew.warmup()
+            result = await support_crew.process_customer_request(
+                "warmup", "warmup-session", {}, warmup=True
+            )
+        if result["agent_used"] == "Fallback Handler":
+            raise RuntimeError("synthetic request fell back to the fallback handler")
+        ChatResponse(
+            response=result["response"],
+            session_id=result["session_id"],
+            agent_used=result["agent_used"],
+            confidence=result["confidence"],
+            escalated=result["escalated"]
+        )
+        logger.info("✅ Connections warmed up")
+    except TimeoutError:
+        logger.warning("⚠️ Warmup exceeded its %ss budget", settings.warmup_timeout)
+    except Exception as e:
+        logger.warning("⚠️ Warmup failed: %s", e)
+
+class AccessLogMiddleware:
+    """Pure ASGI middleware emitting one JSON access log line per HTTP request"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger("access")
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        # Anything that fails before a response starts is served as a 500
+        status = 500
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self.logger.isEnabledFor(logging.INFO):
+                client = scope.get("client")
+                self.logger.info(orjson.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                    "client": client[0] if client else None
+                }).decode())
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Customer Support Agent API",
     description="Production-ready customer support with AI agents",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -137,6 +341,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Structured access logs in production, replacing uvicorn's plain-text access log
+if settings.environment == "production":
+    logging.getLogger("uvicorn.access").disabled = True
+    app.add_middleware(AccessLogMiddleware)
+
 # Security
 security = HTTPBearer()
 
@@ -155,9 +364,10 @@ async def health_check():
         uptime="System operational"
     )
 
-@app.post("/api/v1/chat", response_model=ChatResponse)
+@app.post("/api/v1/chat", response_model=ChatResponse, response_model_exclude_none=True)
 async def chat_with_agent(
     chat_request: ChatMessage,
+    response: Response,
     token: str = Depends(verify_token)
 ):
     """
@@ -174,34 +384,40 @@ async def chat_with_agent(
         result = await support_crew.process_customer_request(
             message=chat_request.message,
             session_id=chat_request.session_id,
-            customer_info=chat_request.customer_info or {}
+            customer_info=(
+                chat_request.customer_info.model_dump(exclude_none=True)
+                if chat_request.customer_info else {}
+            )
         )
+        response.headers["X-Cache"] = "HIT" if result["cached"] else "MISS"
+        now = datetime.utcnow()
         
-        # Store conversation in Redis if available
-        if redis_client:
-            await store_conversation(
+        # Store conversation and push the real-time WebSocket update concurrently
+        await asyncio.gather(
+            store_conversation(
                 chat_request.session_id,
                 chat_request.message,
-                result["response"]
-            )
-        
-        # Send real-time update via WebSocket
-        await manager.send_message(chat_request.session_id, {
-            "type": "agent_response",
-            "response": result["response"],
-            "agent": result["agent_used"]
-        })
+                result["response"],
+                now
+            ),
+            manager.send_message(chat_request.session_id, {
+                "type": "agent_response",
+                "response": result["response"],
+                "agent": result["agent_used"]
+            })
+        )
         
         return ChatResponse(
             response=result["response"],
             session_id=chat_request.session_id,
             agent_used=result["agent_used"],
             confidence=result["confidence"],
-            escalated=result["escalated"]
+            escalated=result["escalated"],
+            timestamp=now
         )
         
     except Exception as e:
-        logger.error(f"Error processing chat request: {e}")
+        logger.error("Error processing chat request: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.websocket("/ws/{session_id}")
@@ -209,36 +425,48 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """
     WebSocket endpoint for real-time chat
     
-    Enables real-time bidirectional communication for chat interface
+    Enables real-time bidirectional communication for chat interface. Responses
+    are streamed as "delta" frames followed by a single "done" frame.
     """
     await manager.connect(websocket, session_id)
     try:
         while True:
             # Receive message from client
-            data = await websocket.receive_json()
+            frame = await websocket.receive_text()
             
-            # Process through support crew
+            # Validate the whole frame with the same rules as the REST endpoint;
+            # a bad frame gets an error frame and the session stays open
+            try:
+                chat_message = WebSocketMessage.model_validate_json(frame)
+            except ValidationError as e:
+                error = e.errors()[0]
+                location = ".".join(str(part) for part in error["loc"]) or "frame"
+                await websocket.send_bytes(encode_message({
+                    "type": "error",
+                    "detail": f"{location}: {error['msg']}"
+                }))
+                continue
+            
+            # Stream token deltas back as they are generated, then a done frame
             support_crew = app.state.support_crew
-            result = await support_crew.process_customer_request(
-                message=data["message"],
+            async for event in support_crew.process_customer_request_stream(
+                message=chat_message.message,
                 session_id=session_id,
-                customer_info=data.get("customer_info", {})
-            )
-            
-            # Send response back
-            await manager.send_message(session_id, {
-                "type": "agent_response",
-                "response": result["response"],
-                "agent": result["agent_used"],
-                "escalated": result["escalated"],
-                "timestamp": datetime.utcnow().isoformat()
-            })
+                customer_info=(
+                    chat_message.customer_info.model_dump(exclude_none=True)
+                    if chat_message.customer_info else {}
+                )
+            ):
+                if event["type"] == "done":
+                    event["timestamp"] = datetime.utcnow()
+                # This worker holds the socket, so deltas skip the pub/sub hop
+                await websocket.send_bytes(encode_message(event))
             
     except WebSocketDisconnect:
-        manager.disconnect(session_id)
+        await manager.disconnect(session_id)
     except Exception as e:
-        logger.error(f"WebSocket error: {e}")
-        manager.disconnect(session_id)
+        logger.error("WebSocket error: %s", e)
+        await manager.disconnect(session_id)
 
 @app.get("/api/v1/conversations/{session_id}")
 async def get_conversation_history(
@@ -250,10 +478,11 @@ async def get_conversation_history(
         raise HTTPException(status_code=503, detail="Session storage not available")
     
     try:
-        history = await redis_client.lrange(f"conversation:{session_id}", 0, -1)
+        entries = await redis_client.lrange(f"conversation:{session_id}", 0, -1)
+        history = [msgpack.unpackb(entry) for entry in entries]
         return {"session_id": session_id, "history": history}
     except Exception as e:
-        logger.error(f"Error retrieving conversation: {e}")
+        logger.error("Error retrieving conversation: %s", e)
         raise HTTPException(status_code=500, detail="Failed to retrieve conversation")
 
 @app.get("/api/v1/analytics/dashboard")
@@ -267,41 +496,55 @@ async def get_analytics_dashboard(token: str = Depends(verify_token)):
             "avg_response_time": 1.2,
             "satisfaction_score": 4.7,
             "escalation_rate": 0.08,
-            "active_sessions": len(manager.active_connections),
+            "active_sessions": await manager.active_session_count(),
             "agents_status": {
                 "support_agent": "active",
                 "escalation_agent": "active",
                 "manager_agent": "active"
-            }
+            },
+            "analyze_cache": analyze_message.cache_info()._asdict(),
+            "model_usage": dict(app.state.support_crew.model_usage)
         }
     except Exception as e:
-        logger.error(f"Error getting analytics: {e}")
+        logger.error("Error getting analytics: %s", e)
         raise HTTPException(status_code=500, detail="Analytics unavailable")
 
-async def store_conversation(session_id: str, user_message: str, agent_response: str):
+async def store_conversation(
+    session_id: str,
+    user_message: str,
+    agent_response: str,
+    timestamp: datetime
+):
     """Store conversation in Redis"""
     if redis_client:
         try:
             conversation_entry = {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp.isoformat(),
                 "user": user_message,
                 "agent": agent_response
             }
-            await redis_client.lpush(
-                f"conversation:{session_id}",
-                str(conversation_entry)
-            )
-            # Expire after 24 hours
-            await redis_client.expire(f"conversation:{session_id}", 86400)
+            key = f"conversation:{session_id}"
+            # Push and set expiry (24 hours) in a single round-trip
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.lpush(key, msgpack.packb(conversation_entry))
+                pipe.expire(key, 86400)
+                await pipe.execute()
         except Exception as e:
-            logger.error(f"Failed to store conversation: {e}")
+            logger.error("Failed to store conversation: %s", e)
 
 if __name__ == "__main__":
-    # Run the application
+    # Run the application on uvloop with the httptools parser
+    environment = os.getenv("ENVIRONMENT", "development")
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", 8000)),
-        reload=os.getenv("ENVIRONMENT") == "development",
+        reload=environment == "development",
+        # Reload mode runs a single process
+        workers=None if environment == "development" else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
+        # Access log lines are synchronous writes on the request path
+        access_log=environment != "production",
         log_level="info"
     )
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""Shared test setup: import app modules the way main.py does"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+# Settings require an OpenAI key at import time
+os.environ.setdefault("CUSTOMER_SUPPORT_OPENAI_API_KEY", "test-key")
@@ -0,0 +1,39 @@
+"""Tests for customer message analysis"""
+
+import pytest
+
+# Keyword lists come from the pydantic settings module
+pytest.importorskip("pydantic_settings")
+
+from agents.analysis import analyze_message, normalize_message
+
+@pytest.mark.parametrize("variant", [
+    "How do I reset my password?",
+    "how do i reset my password",
+    "HOW DO I RESET MY PASSWORD!!!",
+    "  How   do I\treset my password ? ",
+    "How, do I reset... my password?\n",
+])
+def test_normalize_message_collapses_variants(variant):
+    assert normalize_message(variant) == "how do i reset my password"
+
+def test_normalize_message_is_deterministic():
+    message = "Where's my ORDER #1234?!"
+    assert normalize_message(message) == normalize_message(message)
+    assert normalize_message(message) == "wheres my order 1234"
+
+def test_normalize_message_keeps_distinct_questions_distinct():
+    assert normalize_message("refund status") != normalize_message("refund policy")
+
+@pytest.mark.parametrize("message, expected", [
+    ("i have problems with my refunds", ("high", "high")),
+    ("i have a problem with my refund", ("high", "high")),
+    ("both databases are down", ("urgent", "high")),
+    ("what are the statuses of my orders", ("normal", "low")),
+    ("hello there", ("normal", "medium")),
+])
+def test_analyze_message_matches_plurals(message, expected):
+    assert analyze_message(message) == expected
+
+def test_analyze_message_matches_whole_words_only():
+    assert analyze_message("the accountant said hi") == ("normal", "medium")
@@ -0,0 +1,86 @@
+"""Tests for the LLM request batcher"""
+
+import asyncio
+
+import pytest
+
+# The batcher only needs langchain_core, not CrewAI
+pytest.importorskip("langchain_core")
+
+from agents.batching import RequestBatcher
+
+pytestmark = pytest.mark.asyncio
+
+class StubLLM:
+    """Runnable stand-in that records each batch; inputs starting with "fail" raise"""
+    
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+    
+    async def abatch(self, inputs, return_exceptions=False):
+        self.batches.append(list(inputs))
+        await asyncio.sleep(self.delay)
+        return [
+            ValueError(item) if str(item).startswith("fail") else f"answer:{item}"
+            for item in inputs
+        ]
+
+async def test_call_resolves_within_one_window():
+    llm = StubLLM()
+    batcher = RequestBatcher(llm, window_ms=10)
+    
+    assert await asyncio.wait_for(batcher.submit("hi"), 1) == "answer:hi"
+    assert llm.batches == [["hi"]]
+    await batcher.close()
+
+async def test_batch_splits_at_max_size():
+    llm = StubLLM()
+    batcher = RequestBatcher(llm, window_ms=50, max_size=2)
+    
+    results = await asyncio.wait_for(
+        asyncio.gather(*[batcher.submit(i) for i in range(5)]), 1
+    )
+    
+    assert results == [f"answer:{i}" for i in range(5)]
+    assert [len(batch) for batch in llm.batches] == [2, 2, 1]
+    await batcher.close()
+
+async def test_item_exception_only_fails_its_caller():
+    llm = StubLLM()
+    batcher = RequestBatcher(llm, window_ms=10)
+    
+    results = await asyncio.wait_for(asyncio.gather(
+        batcher.submit("first"),
+        batcher.submit("fail"),
+        batcher.submit("last"),
+        return_exceptions=True
+    ), 1)
+    
+    assert results[0] == "answer:first"
+    assert isinstance(results[1], ValueError)
+    assert results[2] == "answer:last"
+    assert len(llm.batches) == 1
+    await batcher.close()
+
+async def test_close_fails_queued_calls():
+    llm = StubLLM()
+    batcher = RequestBatcher(llm, window_ms=1000)
+    calls = [asyncio.create_task(batcher.submit(i)) for i in range(3)]
+    await asyncio.sleep(0.01)
+    
+    await batcher.close()
+    results = await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), 1)
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert llm.batches == []
+
+async def test_close_waits_for_in_flight_batches():
+    llm = StubLLM(delay=0.05)
+    batcher = RequestBatcher(llm, window_ms=1)
+    call = asyncio.create_task(batcher.submit("hi"))
+    await asyncio.sleep(0.02)
+    
+    await batcher.close()
+    
+    assert call.done() and call.result() == "answer:hi"
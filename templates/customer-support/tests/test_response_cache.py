@@ -0,0 +1,86 @@
+"""Tests for the response cache"""
+
+import pytest
+
+# The cache needs only Redis and the settings module, not CrewAI
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("redis")
+
+from agents.response_cache import ResponseCache
+from config.settings import settings
+
+pytestmark = pytest.mark.asyncio
+
+class FakeRedis:
+    """In-memory stand-in for the async Redis client"""
+    
+    def __init__(self):
+        self.store = {}
+    
+    async def get(self, key):
+        return self.store.get(key)
+    
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+class FailingRedis:
+    """Async Redis stand-in whose every call fails"""
+    
+    async def get(self, key):
+        raise ConnectionError("redis down")
+    
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis down")
+
+def answer(escalated=False, confidence=0.9):
+    return {"response": "Refunds take 5-7 days.", "escalated": escalated, "confidence": confidence}
+
+async def test_key_isolates_customers():
+    cache = ResponseCache()
+    key = cache.key("gpt-4", "Refund status?", {"id": "1", "tier": "gold"})
+    
+    assert key != cache.key("gpt-4", "Refund status?", {"id": "2", "tier": "gold"})
+    assert key != cache.key("gpt-4", "Refund status?", {"id": "1", "tier": "basic"})
+    assert key != cache.key("gpt-4", "Refund status?", {"id": "1", "tier": "gold", "locale": "de"})
+    assert key != cache.key("gpt-4o-mini", "Refund status?", {"id": "1", "tier": "gold"})
+
+async def test_key_ignores_wording_and_fields_outside_the_prompt():
+    cache = ResponseCache()
+    key = cache.key("gpt-4", "Refund status?", {"id": "1", "tier": "gold"})
+    
+    assert key == cache.key("gpt-4", "  refund STATUS ", {"tier": "gold", "id": "1"})
+    assert key == cache.key("gpt-4", "Refund status?", {"id": "1", "tier": "gold", "email": "a@b.c"})
+
+async def test_confident_answer_round_trips():
+    cache = ResponseCache(FakeRedis())
+    
+    await cache.store("resp:1", answer())
+    
+    assert await cache.get("resp:1") == answer()
+
+@pytest.mark.parametrize("result", [
+    answer(escalated=True),
+    answer(confidence=settings.response_cache_min_confidence - 0.01),
+])
+async def test_escalated_and_low_confidence_answers_are_not_cached(result):
+    redis_client = FakeRedis()
+    cache = ResponseCache(redis_client)
+    
+    await cache.store("resp:1", result)
+    
+    assert redis_client.store == {}
+    assert await cache.get("resp:1") is None
+
+async def test_cache_errors_never_fail_the_request():
+    cache = ResponseCache(FailingRedis())
+    
+    await cache.store("resp:1", answer())
+    
+    assert await cache.get("resp:1") is None
+
+async def test_no_client_disables_the_cache():
+    cache = ResponseCache()
+    
+    await cache.store("resp:1", answer())
+    
+    assert await cache.get("resp:1") is None